@@ -0,0 +1,168 @@
+"""ESOL 데이터 로드 및 RDKit 물성 계산 (모든 노트북의 첫 셀에서 공용으로 사용)
+
+LLM 실험 노트북(opt_llm_response_*)이 공용으로 쓰는 시드별 분할, 프롬프트 생성, 결과 파일 기록 루프도 함께 둠
+"""
+import asyncio
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from rdkit import Chem
+from rdkit.Chem import Descriptors
+
+DESCRIPTOR_COLUMNS = ['LogP', 'TPSA', 'sp3', 'MolMR', 'BJ', 'Chi', 'HKA']
+DESCRIPTOR_CHUNK_SIZE = 64
+
+
+# 분자 묶음 단위로 SMILES를 한 번만 파싱해 canonical SMILES와 7개 물성을 함께 계산
+# (물성은 미리 할당한 (n, 7) 배열에 채움, loky worker에서 실행되므로 모듈 최상위 함수로 둠)
+def _featurize_chunk(smiles_chunk):
+    canonical = []
+    out = np.empty((len(smiles_chunk), len(DESCRIPTOR_COLUMNS)), dtype=np.float64)
+    for i, smiles in enumerate(smiles_chunk):
+        mol = Chem.MolFromSmiles(smiles)
+        canonical.append(Chem.MolToSmiles(mol))
+        out[i, 0] = Descriptors.MolLogP(mol)
+        out[i, 1] = Descriptors.TPSA(mol)
+        out[i, 2] = Descriptors.FractionCSP3(mol)
+        out[i, 3] = Descriptors.MolMR(mol)
+        out[i, 4] = Descriptors.BalabanJ(mol)
+        out[i, 5] = Descriptors.Chi1v(mol)
+        out[i, 6] = Descriptors.HallKierAlpha(mol)
+    return canonical, out
+
+
+# canonical_smiles와 RDKit 물성 열 추가 (분자당 SMILES 파싱 1회, 코어 단위 병렬 처리)
+# 중복 SMILES는 한 번만 계산한 뒤 원래 행 순서로 복원
+def add_rdkit_descriptors(esol):
+    unique_smiles, inverse = np.unique(esol['smiles'].to_numpy(), return_inverse=True)
+    parts = Parallel(n_jobs=-1, backend='loky')(
+        delayed(_featurize_chunk)(unique_smiles[i:i + DESCRIPTOR_CHUNK_SIZE])
+        for i in range(0, len(unique_smiles), DESCRIPTOR_CHUNK_SIZE))
+    esol['canonical_smiles'] = np.array([s for canonical, _ in parts for s in canonical], dtype=object)[inverse]
+    esol[DESCRIPTOR_COLUMNS] = np.concatenate([out for _, out in parts])[inverse]
+    return esol
+
+
+# ESOL csv를 읽고 smiles_len, 'aM_w+b' (a * 분자량 + b), canonical_smiles, RDKit 물성 열을 추가
+def load_esol(path, a, b):
+    esol = pd.read_csv(path)
+    esol['smiles_len'] = np.fromiter((len(s) for s in esol['smiles'].to_numpy()), dtype=np.int64, count=len(esol))
+    esol['aM_w+b'] = a * esol['Molecular Weight'].to_numpy() + b
+    return add_rdkit_descriptors(esol)
+
+
+# esol_df.sample(n=1, random_state=seed) 후 drop(...).sample(n=50, random_state=seed)와 정확히 같은 행을
+# DataFrame 복사 없이 위치 인덱스로 선택 (pandas sample은 시드마다 새 RandomState의 choice를 사용)
+def sample_split(n, seed, n_train=50):
+    test_idx = np.random.RandomState(seed).choice(n, size=1, replace=False)[0]
+    pool = np.delete(np.arange(n), test_idx)
+    train_idx = pool[np.random.RandomState(seed).choice(n - 1, size=n_train, replace=False)]
+    return test_idx, train_idx
+
+
+# 힌트 종류별 프롬프트 템플릿 (모듈 로드 시 한 번만 생성, 호출 시에는 선택된 템플릿만 format)
+PROMPT_TEMPLATES = {
+    # No any hint
+    'no_hint': """You are an experienced chemist with expertise in molecular structures. Using only your knowledge and without employing any external tools or code, predict the property for the following molecules. Below are examples of molecules and known property value:\n\n{examples}\n\nNow, based on these examples, predict the property for the following molecule:\n\n{smiles}\n\nPlease provide the predicted specific property value!""",
+    # Label hint
+    'label_hint': """You are an experienced chemist with expertise in molecular structures. Using only your knowledge and without employing any external tools or code, predict the molecular weight for the following molecules. Below are examples of molecules and known molecular weights:\n\n{examples}\n\nNow, based on these examples, predict the molecular weight for the following molecule:\n\n{smiles}\n\nPlease provide the predicted specific molecular weight value!""",
+    # All hint
+    'all_hint': """You are an experienced chemist with expertise in molecular structures. Using only your knowledge and without employing any external tools or code, predict the molecular weight for the following molecules. Below are examples of molecules in SMILES format and their known molecular weights:\n\n{examples}\n\nNow, based on these examples, predict the molecular weight for the following molecule given in SMILES format:\n\n{smiles}\n\nPlease provide the predicted specific molecular weight value!""",
+    # SMILES hint
+    'smiles_hint': """You are an experienced chemist with expertise in molecular structures. Using only your knowledge and without employing any external tools or code, predict the property for the following molecules. Below are examples of molecules in SMILES format and known property value:\n\n{examples}\n\nNow, based on these examples, predict the property for the following molecule given in SMILES format:\n\n{smiles}\n\nPlease provide the predicted specific property value!""",
+    # SMILES & f(M.W.) hint
+    'smiles_fmw_hint': """You are an experienced chemist with expertise in molecular structures. Using only your knowledge and without employing any external tools or code, predict the property for the following molecules. Below are examples of molecules in SMILES format and known property values. Note that the property is a function of molecular weight, f(M.W.):\n\n{examples}\n\nNow, based on these examples, predict the property for the following molecule given in SMILES format:\n\n{smiles}\n\nPlease provide the predicted specific property value!""",
+    # SMILES & a*M.W.+b hint
+    'smiles_linear_hint': """You are an experienced chemist with expertise in molecular structures. Using only your knowledge and without employing any external tools or code, predict the property for the following molecules. Below are examples of molecules in SMILES format and known property values. Note that the property is represented as a linear function of molecular weight, specifically a * M.W. + b:\n\n{examples}\n\nNow, based on these examples, predict the property for the following molecule given in SMILES format:\n\n{smiles}\n\nPlease provide the predicted specific property value!""",
+}
+
+
+# 예시 한 줄("SMILES, 값")을 물성별로 한 번만 만들어 두고, 시드마다 train_idx로 골라 join만 수행
+# smiles_column: 기본은 기록된 응답과 같은 프롬프트가 되도록 원본 'smiles',
+#                새 실험에서 canonical SMILES로 묻고 싶을 때만 'canonical_smiles'를 명시
+def format_example_lines(esol_df, property, smiles_column='smiles'):
+    return np.array([f"{s}, {round(mw, 8)}" for s, mw in zip(esol_df[smiles_column].tolist(), esol_df[property].tolist())], dtype=object)
+
+
+# 매 실험마다 새로운 예시를 생성하는 프롬프트 생성 함수
+def create_prompt(smiles, example_str, hint_type='no_hint'):
+    return PROMPT_TEMPLATES.get(hint_type, PROMPT_TEMPLATES['no_hint']).format(examples=example_str, smiles=smiles)
+
+
+# 프롬프트 미리보기 함수
+def run_prompt_preview(esol_df, property, smiles_column='smiles'):
+    smiles_arr = esol_df[smiles_column].to_numpy()
+    example_lines = format_example_lines(esol_df, property, smiles_column)
+    for seed in range(1, 101):
+        # Test와 Train 데이터 생성
+        test_idx, train_idx = sample_split(len(smiles_arr), seed)
+        
+        smiles_test = smiles_arr[test_idx]
+        example_str = "\n".join(example_lines[train_idx])
+        
+        # 프롬프트 생성 및 출력 (10번째마다 출력)
+        if seed % 1 == 0:
+            print(f"\n--- Prompt for iteration {seed} ---\n{create_prompt(smiles_test, example_str)}\n")
+            #print(esol_df['Molecular Weight'].values[test_idx])
+
+
+# 시드별 예측을 동시에 요청하고 (동시 요청 수는 semaphore로 제한) 결과를 txt 파일에 기록
+# predict: 각 노트북의 모델별 예측 코루틴 함수 (smiles, example_str) -> 응답 문자열
+# mode: 새 실험은 'w', 기존 결과 파일에 일부 시드만 다시 돌려 붙일 때는 'a'
+# smiles_column: 프롬프트와 결과 파일의 SMILES 열 ('a' 모드로 기존 파일에 이어 쓸 때는 기본값 'smiles'를 유지)
+async def run_llm_experiment_to_txt(predict, esol_df, filename, property, seeds, mode='w', max_concurrent=10,
+                                    smiles_column='smiles'):
+    smiles_arr = esol_df[smiles_column].to_numpy()
+    prop_arr = esol_df[property].to_numpy()
+    example_lines = format_example_lines(esol_df, property, smiles_column)
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    # 시드별 요청은 서로 독립적이므로 동시에 보내고 (동시 요청 수는 semaphore로 제한)
+    async def predict_one(seed):
+        # Test와 Train 데이터 생성
+        test_idx, train_idx = sample_split(len(smiles_arr), seed)
+        smiles_test = smiles_arr[test_idx]
+        true_value = prop_arr[test_idx]
+        example_str = "\n".join(example_lines[train_idx])
+
+        async with semaphore:
+            try:
+                predicted_property = await predict(smiles_test, example_str)
+            except Exception as exc:
+                # 실패한 시드는 예외 객체를 그대로 돌려줘 결과 파일에 쓰지 않고 원인과 함께 따로 집계
+                return seed, smiles_test, true_value, exc
+        return seed, smiles_test, true_value, predicted_property
+
+    tasks = [asyncio.create_task(predict_one(seed)) for seed in seeds]
+
+    failed_seeds = []  # API 호출이 실패한 (시드, 예외)
+    try:
+        # 결과 파일의 디렉토리가 없으면 생성 (실행당 한 번, 단독 호출 시에도 동작)
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        # 완료된 결과부터 시드 순서대로 파일에 기록 (중단되더라도 앞선 시드 결과는 남도록 10개마다 flush)
+        with open(filename, mode, encoding='utf-8') as f:
+            for i, task in enumerate(tasks, 1):
+                seed, smiles_test, true_value, predicted_property = await task
+                if isinstance(predicted_property, Exception):
+                    failed_seeds.append((seed, predicted_property))
+                    continue
+                f.write(f"Iteration: {seed}\n")
+                f.write(f"SMILES: {smiles_test}\n")
+                f.write(f"True Property: {true_value}\n")
+                f.write("Predicted Property:\n")
+                f.write(f"{predicted_property}\n")
+                f.write("="*50 + "\n")  # 구분선 추가
+                if i % 10 == 0:
+                    f.flush()
+    finally:
+        # 셀 중단이나 파일 쓰기 오류로 빠져나가도 남은 요청이 이벤트 루프에서 계속 API를 호출하지 않도록 취소
+        for task in tasks:
+            task.cancel()
+
+    if failed_seeds:
+        print(f"⚠️  {len(failed_seeds)}개 시드 API 호출 실패 (파일에 기록하지 않음):")
+        for seed, exc in failed_seeds:
+            print(f"  Iteration {seed}: {type(exc).__name__}: {exc}")
+    print(f"Data successfully saved to {filename}")